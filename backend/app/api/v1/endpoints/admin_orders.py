@@ -51,13 +51,13 @@ def list_orders(
             except (ValueError, TypeError):
                 executor_uuid = None
         
-        orders = order_service.list_admin_orders(db, status=status, executor_id=executor_uuid, department_code=departmentCode)
+        orders = order_service.list_admin_orders_rows(db, status=status, executor_id=executor_uuid, department_code=departmentCode)
         
         result = []
         for order in orders:
             try:
                 # Клиент
-                client = user_service.get_user_by_id(db, order.client_id)
+                client = user_service.get_user_by_id(db, order["client_id"])
                 
                 # Исполнитель
                 executor = None
@@ -65,7 +65,7 @@ def list_orders(
                 try:
                     assignment = db.scalar(
                         select(ExecutorAssignment)
-                        .where(ExecutorAssignment.order_id == order.id)
+                        .where(ExecutorAssignment.order_id == order["id"])
                         .order_by(ExecutorAssignment.assigned_at.desc())
                         .limit(1)
                     )
@@ -73,7 +73,7 @@ def list_orders(
                         executor = user_service.get_user_by_id(db, assignment.executor_id)
                         # Получаем последний комментарий из истории статусов
                         from app.services.order_service import get_status_history
-                        history = get_status_history(db, order.id)
+                        history = get_status_history(db, order["id"])
                         if history:
                             executor_comment = history[-1].comment
                 except Exception:
@@ -83,62 +83,62 @@ def list_orders(
                 files_count = 0
                 try:
                     files_count = db.scalar(
-                        select(func.count()).select_from(OrderFile).where(OrderFile.order_id == order.id)
+                        select(func.count()).select_from(OrderFile).where(OrderFile.order_id == order["id"])
                     ) or 0
                 except Exception:
                     pass
                 
                 # Название услуги
-                order_status = str(order.status)
-                if hasattr(order.status, 'value'):
-                    order_status = order.status.value
+                order_status = str(order["status"])
+                if hasattr(order["status"], 'value'):
+                    order_status = order["status"].value
                 
                 result.append(AdminOrderListItem(
-                    id=order.id,
+                    id=order["id"],
                     status=order_status,
-                    title=order.title or "",
-                    description=order.description or None,
-                    clientId=order.client_id,
+                    title=order["title"] or "",
+                    description=order["description"] or None,
+                    clientId=order["client_id"],
                     clientName=client.full_name if client else None,
                     executorId=executor.id if executor else None,
                     executorName=executor.full_name if executor else None,
-                    currentDepartmentCode=order.current_department_code,
-                    totalPrice=order.total_price,
+                    currentDepartmentCode=order["current_department_code"],
+                    totalPrice=order["total_price"],
                     filesCount=files_count,
-                    createdAt=order.created_at,
-                    plannedVisitAt=order.planned_visit_at,
-                    completedAt=order.completed_at,
+                    createdAt=order["created_at"],
+                    plannedVisitAt=order["planned_visit_at"],
+                    completedAt=order["completed_at"],
                     executorComment=executor_comment,
                 ))
             except Exception as e:
                 # Логируем ошибку для конкретного заказа, но продолжаем обработку остальных
                 import traceback
-                print(f"ERROR processing order {order.id}: {e}")
+                print(f"ERROR processing order {order['id']}: {e}")
                 print(traceback.format_exc())
                 # Все равно добавляем заказ с минимальными данными
                 try:
-                    order_status = str(order.status)
-                    if hasattr(order.status, 'value'):
-                        order_status = order.status.value
+                    order_status = str(order["status"])
+                    if hasattr(order["status"], 'value'):
+                        order_status = order["status"].value
                     result.append(AdminOrderListItem(
-                        id=order.id,
+                        id=order["id"],
                         status=order_status,
-                        title=order.title or "",
-                        description=order.description or None,
-                        clientId=order.client_id,
+                        title=order["title"] or "",
+                        description=order["description"] or None,
+                        clientId=order["client_id"],
                         clientName=None,
                         executorId=None,
                         executorName=None,
-                        currentDepartmentCode=order.current_department_code,
-                        totalPrice=order.total_price,
+                        currentDepartmentCode=order["current_department_code"],
+                        totalPrice=order["total_price"],
                         filesCount=0,
-                        createdAt=order.created_at,
-                        plannedVisitAt=order.planned_visit_at,
-                        completedAt=order.completed_at,
+                        createdAt=order["created_at"],
+                        plannedVisitAt=order["planned_visit_at"],
+                        completedAt=order["completed_at"],
                         executorComment=None,
                     ))
                 except Exception as e2:
-                    print(f"CRITICAL: Failed to add order {order.id} even with minimal data: {e2}")
+                    print(f"CRITICAL: Failed to add order {order['id']} even with minimal data: {e2}")
         
         return result
     except Exception as e:
@@ -211,9 +211,7 @@ def get_order(
         # Обрабатываем историю статусов
         status_history_list = []
         try:
-            # Получаем историю статусов через функцию для надежности
-            from app.services.order_service import get_status_history
-            history = get_status_history(db, order_id)
+            history = details.get("statusHistory", [])
             # Преобразуем каждую запись истории с обработкой changed_by
             for h in history:
                 try:
@@ -273,7 +271,7 @@ def update_order(
         raise HTTPException(status_code=404, detail="Order not found")
     
     if data.status is not None:
-        order_service.add_status_history(db, order, data.status, admin)
+        order_service.add_status_history(db, order, data.status, admin, commit=False)
     
     if data.current_department_code is not None:
         order.current_department_code = data.current_department_code
@@ -306,7 +304,7 @@ def assign_executor(
     order = order_service.get_order(db, order_id)
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
-    executor = user_service.get_user_by_id(db, payload.executor_id)
+    executor = user_service.get_executor_by_id(db, payload.executor_id)
     if not executor or not executor.executor_profile:
         raise HTTPException(status_code=404, detail="Executor not found")
     order_service.assign_executor(db, order, executor, assigned_by=admin)
@@ -52,11 +52,13 @@ def list_executors(
 @router.get("/users", response_model=list[User], summary="Список пользователей")
 def list_users(
     role: str | None = Query(default=None, description="Фильтр по роли: client, executor, admin"),
+    limit: int | None = Query(default=None, ge=1, le=500, description="Лимит записей"),
+    offset: int = Query(default=0, ge=0, description="Смещение"),
     db: Session = Depends(get_db_session),
     admin=Depends(get_current_admin),
 ) -> list[User]:
     """Получить список пользователей с фильтром по роли"""
-    users = user_service.list_users(db, role=role)
+    users = user_service.list_users(db, role=role, limit=limit, offset=offset)
     return [User.model_validate(user) for user in users]
 
 
@@ -117,9 +117,8 @@ def _split_wall_segments(plan: dict) -> dict:
             new_elem["geometry"] = new_elem_geom
             elements.append(new_elem)
 
-    plan_copy = deepcopy(plan)
-    plan_copy["elements"] = elements
-    return plan_copy
+    # Заменяется только список элементов, остальное можно не копировать
+    return {**plan, "elements": elements}
 
 
 def _apply_split_to_plan_version(plan_version):
@@ -12,6 +12,7 @@ from app.schemas.orders import (
     OrderStatusHistoryItem,
     AvailableSlot,
     ExecutorScheduleVisitRequest,
+    ExecutorScheduleVisitBatchRequest,
     ScheduleVisitUpdateRequest,
     ExecutorCalendarEvent,
     ExecutorApprovePlanRequest,
@@ -280,6 +281,26 @@ def schedule_visit(
     return ExecutorCalendarEvent.model_validate(event)
 
 
+@router.post("/orders/{order_id}/schedule-visit/batch", response_model=list[ExecutorCalendarEvent])
+def schedule_visits_batch(
+    order_id: uuid.UUID,
+    payload: ExecutorScheduleVisitBatchRequest,
+    db: Session = Depends(get_db_session),
+    current_user=Depends(get_current_user),
+):
+    _ensure_executor(current_user)
+    order = order_service.get_order(db, order_id)
+    if not order:
+        raise HTTPException(status_code=404, detail="Order not found")
+    events = order_service.schedule_visits(
+        db,
+        order,
+        executor_id=current_user.id,
+        visits=payload.events,
+    )
+    return [ExecutorCalendarEvent.model_validate(event) for event in events]
+
+
 @router.patch("/orders/{order_id}/schedule-visit", response_model=ExecutorCalendarEvent)
 def update_visit(
     order_id: uuid.UUID,
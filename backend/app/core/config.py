@@ -14,6 +14,7 @@ class Settings(BaseSettings):
     static_dir: str = Field(default="static")
     static_url: str = Field(default="/static")
     request_documents_prefix: str = Field(default="requests")
+    require_fsync: bool = Field(default=False, description="Выполнять fsync после записи загруженных файлов")
     
     # AI настройки (только Gemini)
     gemini_api_key: Optional[str] = Field(default=None, description="API ключ Gemini")
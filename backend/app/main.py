@@ -66,6 +66,11 @@ try:
                     if 'is_superadmin' not in user_columns:
                         print("🔄 Migrating: Adding is_superadmin to users table...")
                         cursor.execute("ALTER TABLE users ADD COLUMN is_superadmin BOOLEAN DEFAULT 0 NOT NULL")
+                    
+                    # Миграция: частичный индекс по администраторам
+                    cursor.execute(
+                        "CREATE INDEX IF NOT EXISTS ix_users_is_admin_true ON users (id) WHERE is_admin IS 1"
+                    )
                 
                 # Проверяем существование таблицы order_plan_versions
                 cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='order_plan_versions'")
@@ -82,6 +87,57 @@ try:
                         print("🔄 Migrating: Adding created_by_id to order_plan_versions table...")
                         cursor.execute("ALTER TABLE order_plan_versions ADD COLUMN created_by_id TEXT")
                 
+                # Проверяем существование таблицы order_files
+                cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='order_files'")
+                if cursor.fetchone():
+                    # Миграция: order_files.content_hash
+                    cursor.execute("PRAGMA table_info(order_files)")
+                    file_columns = [row[1] for row in cursor.fetchall()]
+                    if 'content_hash' not in file_columns:
+                        print("🔄 Migrating: Adding content_hash to order_files table...")
+                        cursor.execute("ALTER TABLE order_files ADD COLUMN content_hash VARCHAR(64)")
+                
+                # Проверяем существование таблицы executor_assignments
+                cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='executor_assignments'")
+                if cursor.fetchone():
+                    # Миграция: уникальный индекс (order_id, executor_id)
+                    cursor.execute("SELECT name FROM sqlite_master WHERE type='index' AND name='uq_assignment_order_exec'")
+                    if not cursor.fetchone():
+                        print("🔄 Migrating: Adding unique index uq_assignment_order_exec...")
+                        # Дубли пары заказ-исполнитель схлопываем в одну запись: оставляем самую
+                        # продвинутую по статусу, при равенстве - последнюю по updated_at
+                        cursor.execute(
+                            "DELETE FROM executor_assignments WHERE rowid IN ("
+                            "SELECT rowid FROM ("
+                            "SELECT rowid, ROW_NUMBER() OVER ("
+                            "PARTITION BY order_id, executor_id ORDER BY "
+                            "CASE status WHEN 'COMPLETED' THEN 0 WHEN 'ACCEPTED' THEN 1 "
+                            "WHEN 'ASSIGNED' THEN 2 ELSE 3 END, "
+                            "updated_at DESC, rowid DESC"
+                            ") AS rn FROM executor_assignments"
+                            ") WHERE rn > 1)"
+                        )
+                        if cursor.rowcount:
+                            print(f"⚠️  Removed duplicate executor assignments: {cursor.rowcount}")
+                        cursor.execute(
+                            "CREATE UNIQUE INDEX uq_assignment_order_exec "
+                            "ON executor_assignments (order_id, executor_id)"
+                        )
+                
+                # Миграция: индексы под частые фильтры order_service
+                for index_name, table_name, index_columns in (
+                    ("ix_order_client_id", "orders", "client_id"),
+                    ("ix_assignment_exec_status", "executor_assignments", "executor_id, status"),
+                    ("ix_plan_version_order_type", "order_plan_versions", "order_id, version_type"),
+                    ("ix_status_history_order_created", "order_status_history", "order_id, created_at"),
+                    ("ix_calendar_executor", "executor_calendar_events", "executor_id"),
+                ):
+                    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=?", (table_name,))
+                    if cursor.fetchone():
+                        cursor.execute(
+                            f"CREATE INDEX IF NOT EXISTS {index_name} ON {table_name} ({index_columns})"
+                        )
+                
                 conn.commit()
             except sqlite3.Error as e:
                 print(f"⚠️  Migration warning: {e}")
@@ -8,6 +8,7 @@ from sqlalchemy import (
     Enum,
     Float,
     ForeignKey,
+    Index,
     JSON,
     String,
     Text,
@@ -47,6 +48,7 @@ class CalendarStatus(str, enum.Enum):
 
 class Order(Base):
     __tablename__ = "orders"
+    __table_args__ = (Index("ix_order_client_id", "client_id"),)
 
     id: Mapped[uuid.UUID] = mapped_column(GUID(), primary_key=True, default=uuid.uuid4)
     client_id: Mapped[uuid.UUID] = mapped_column(GUID(), ForeignKey("users.id"), nullable=False)
@@ -101,6 +103,7 @@ class Order(Base):
 
 class OrderStatusHistory(Base):
     __tablename__ = "order_status_history"
+    __table_args__ = (Index("ix_status_history_order_created", "order_id", "created_at"),)
 
     id: Mapped[uuid.UUID] = mapped_column(GUID(), primary_key=True, default=uuid.uuid4)
     order_id: Mapped[uuid.UUID] = mapped_column(GUID(), ForeignKey("orders.id"), nullable=False)
@@ -123,6 +126,7 @@ class OrderFile(Base):
     filename: Mapped[str] = mapped_column(String(255))
     path: Mapped[str] = mapped_column(String(500))
     description: Mapped[str | None] = mapped_column(Text)
+    content_hash: Mapped[str | None] = mapped_column(String(64))  # SHA-256 содержимого
     uploaded_by_id: Mapped[uuid.UUID | None] = mapped_column(GUID(), ForeignKey("users.id"))
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), default=datetime.utcnow
@@ -134,6 +138,8 @@ class OrderFile(Base):
 
 class OrderPlanVersion(Base):
     __tablename__ = "order_plan_versions"
+    # Не уникальный: версии EXECUTOR_EDITED и FINAL могут повторяться у одного заказа
+    __table_args__ = (Index("ix_plan_version_order_type", "order_id", "version_type"),)
 
     id: Mapped[uuid.UUID] = mapped_column(GUID(), primary_key=True, default=uuid.uuid4)
     order_id: Mapped[uuid.UUID] = mapped_column(GUID(), ForeignKey("orders.id"), nullable=False)
@@ -170,6 +176,11 @@ class OrderChatMessage(Base):
 
 class ExecutorAssignment(Base):
     __tablename__ = "executor_assignments"
+    __table_args__ = (
+        # Одно назначение на пару заказ-исполнитель (нужно для upsert в order_service)
+        Index("uq_assignment_order_exec", "order_id", "executor_id", unique=True),
+        Index("ix_assignment_exec_status", "executor_id", "status"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(GUID(), primary_key=True, default=uuid.uuid4)
     order_id: Mapped[uuid.UUID] = mapped_column(GUID(), ForeignKey("orders.id"), nullable=False)
@@ -192,6 +203,7 @@ class ExecutorAssignment(Base):
 
 class ExecutorCalendarEvent(Base):
     __tablename__ = "executor_calendar_events"
+    __table_args__ = (Index("ix_calendar_executor", "executor_id"),)
 
     id: Mapped[uuid.UUID] = mapped_column(GUID(), primary_key=True, default=uuid.uuid4)
     executor_id: Mapped[uuid.UUID] = mapped_column(GUID(), ForeignKey("users.id"), nullable=False)
@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import Boolean, DateTime, ForeignKey, Integer, String
+from sqlalchemy import Boolean, DateTime, ForeignKey, Index, Integer, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base_class import Base
@@ -40,6 +40,16 @@ class User(Base):
     )
 
 
+# Частичный индекс только по администраторам: условие совпадает с фильтром
+# list_users(role="admin"), иначе планировщик индекс не использует
+Index(
+    "ix_users_is_admin_true",
+    User.id,
+    postgresql_where=User.is_admin.is_(True),
+    sqlite_where=User.is_admin.is_(True),
+)
+
+
 class ClientProfile(Base):
     __tablename__ = "client_profiles"
 
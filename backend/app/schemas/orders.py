@@ -341,6 +341,13 @@ class ExecutorScheduleVisitRequest(BaseModel):
     model_config = ConfigDict(populate_by_name=True)
 
 
+class ExecutorScheduleVisitBatchRequest(BaseModel):
+    """Несколько выездов по одному заказу одним запросом"""
+    events: list[ExecutorScheduleVisitRequest] = Field(min_length=1, max_length=100)
+
+    model_config = ConfigDict(populate_by_name=True)
+
+
 class RecognizePlanRequest(BaseModel):
     file_id: uuid.UUID = Field(alias="fileId")
 
@@ -10,6 +10,7 @@ from app.schemas.directory import (
     HouseTypeCreate,
     HouseTypeUpdate,
 )
+from app.services.price_calculator import invalidate_pricing_cache
 
 
 def upsert_department(db: Session, data: DepartmentCreate | DepartmentUpdate, code: str | None = None) -> Department:
@@ -43,6 +44,7 @@ def upsert_district(db: Session, data: DistrictCreate | DistrictUpdate, code: st
         district.price_coef = data.price_coef
     db.add(district)
     db.commit()
+    invalidate_pricing_cache()
     db.refresh(district)
     return district
 
@@ -69,6 +71,7 @@ def upsert_house_type(db: Session, data: HouseTypeCreate | HouseTypeUpdate, code
         house_type.price_coef = data.price_coef
     db.add(house_type)
     db.commit()
+    invalidate_pricing_cache()
     db.refresh(house_type)
     return house_type
 
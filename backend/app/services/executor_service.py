@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime, timedelta
 from sqlalchemy import func, select, and_, or_
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, contains_eager
 
 from app.models.order import (
     AssignmentStatus,
@@ -44,9 +44,11 @@ def get_calendar(db: Session, executor_id):
 
 
 def list_executors_by_department(db: Session, department_code: str | None) -> list[User]:
+    # Профиль берём из того же JOIN: роут читает user.executor_profile у каждого исполнителя
     query = (
         select(User)
-        .join(ExecutorProfile, ExecutorProfile.user_id == User.id)
+        .join(User.executor_profile)
+        .options(contains_eager(User.executor_profile))
     )
     if department_code:
         query = query.where(ExecutorProfile.department_code == department_code)
@@ -57,7 +59,7 @@ def get_executor_analytics(
     db: Session, executor_id: uuid.UUID, department_code: str | None = None
 ) -> ExecutorAnalytics | None:
     """Получить аналитику по исполнителю"""
-    executor = user_service.get_user_by_id(db, executor_id)
+    executor = user_service.get_executor_by_id(db, executor_id)
     if not executor or not executor.executor_profile:
         return None
     
@@ -1,9 +1,26 @@
+from datetime import datetime
+from functools import lru_cache
+import hashlib
+from itertools import chain
+import logging
+from operator import attrgetter
+import os
 from pathlib import Path
+from typing import BinaryIO
 import uuid
 
 from fastapi import HTTPException, UploadFile, status
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy import RowMapping, Select, exists, inspect, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import (
+    Session,
+    defer,
+    joinedload,
+    selectinload,
+)
+from sqlalchemy.orm.attributes import flag_modified
 
 from app.core.config import settings
 from app.models.order import (
@@ -17,11 +34,18 @@ from app.models.order import (
     OrderStatusHistory,
 )
 from app.models.user import User
-from app.schemas.orders import CreateOrderRequest, UpdateOrderRequest, SavePlanChangesRequest
+from app.schemas.orders import (
+    CreateOrderRequest,
+    ExecutorScheduleVisitRequest,
+    SavePlanChangesRequest,
+    UpdateOrderRequest,
+)
 from app.services import user_service
 from app.services.price_calculator import calculate_order_price
 from app.services.user_service import ensure_client_profile
 
+logger = logging.getLogger(__name__)
+
 
 def create_order(db: Session, client: User, data: CreateOrderRequest) -> Order:
     ensure_client_profile(db, client)
@@ -61,7 +85,9 @@ def get_user_orders(db: Session, user_id: uuid.UUID) -> list[Order]:
     """Получить все заказы пользователя (как клиента и как исполнителя)"""
     # Заказы, где пользователь является клиентом
     client_orders = db.scalars(
-        select(Order).where(Order.client_id == user_id)
+        select(Order)
+        .where(Order.client_id == user_id)
+        .options(defer(Order.calculator_input))
     ).all()
     
     # Заказы, где пользователь является исполнителем
@@ -69,16 +95,17 @@ def get_user_orders(db: Session, user_id: uuid.UUID) -> list[Order]:
         select(Order)
         .join(ExecutorAssignment)
         .where(ExecutorAssignment.executor_id == user_id)
+        .options(defer(Order.calculator_input))
         .distinct()
     ).all()
     
-    # Объединяем и убираем дубликаты
-    all_orders = list(set(list(client_orders) + list(executor_orders)))
+    # Объединяем и убираем дубликаты по первичному ключу
+    seen: dict[uuid.UUID, Order] = {}
+    for order in chain(client_orders, executor_orders):
+        seen.setdefault(order.id, order)
     
     # Сортируем по дате создания (новые первыми)
-    all_orders.sort(key=lambda o: o.created_at, reverse=True)
-    
-    return all_orders
+    return sorted(seen.values(), key=attrgetter("created_at"), reverse=True)
 
 
 def update_order_by_client(db: Session, order: Order, data: UpdateOrderRequest) -> Order:
@@ -99,6 +126,8 @@ def update_order_by_client(db: Session, order: Order, data: UpdateOrderRequest)
             setattr(order, field, value)
     if data.calculator_input is not None:
         order.calculator_input = data.calculator_input
+        # Помечаем JSON как изменённый: flush не сравнивает старое и новое дерево целиком
+        flag_modified(order, "calculator_input")
     order.estimated_price, _ = calculate_order_price(db, order, order.calculator_input or {})
     db.add(order)
     db.commit()
@@ -107,8 +136,17 @@ def update_order_by_client(db: Session, order: Order, data: UpdateOrderRequest)
 
 
 def add_status_history(
-    db: Session, order: Order, status_value: OrderStatus, user: User | None, comment: str | None = None
+    db: Session,
+    order: Order,
+    status_value: OrderStatus,
+    user: User | None,
+    comment: str | None = None,
+    commit: bool = True,
 ) -> OrderStatusHistory:
+    """
+    Сменить статус заказа и записать его в историю.
+    При commit=False запись только добавляется в сессию - коммит делает вызывающий код.
+    """
     order.status = status_value
     history = OrderStatusHistory(
         order_id=order.id,
@@ -116,23 +154,34 @@ def add_status_history(
         changed_by_id=user.id if user else None,
         comment=comment,
     )
-    db.add(order)
     db.add(history)
-    db.commit()
-    db.refresh(order)
-    db.refresh(history)
+    if commit:
+        db.commit()
     return history
 
 
-def list_admin_orders(
-    db: Session,
+# Колонки, которые реально нужны списку заказов в админ-панели
+ADMIN_ORDER_LIST_COLUMNS = (
+    Order.id,
+    Order.status,
+    Order.title,
+    Order.description,
+    Order.client_id,
+    Order.current_department_code,
+    Order.total_price,
+    Order.created_at,
+    Order.planned_visit_at,
+    Order.completed_at,
+)
+
+
+def _apply_admin_order_filters(
+    query: Select,
     status: OrderStatus | str | None = None,
     executor_id: uuid.UUID | None = None,
     department_code: str | None = None,
-) -> list[Order]:
-    """Список заказов для админ-панели с фильтрами"""
-    query = select(Order)
-    
+) -> Select:
+    """Применить фильтры админ-панели к запросу по заказам"""
     if status:
         if isinstance(status, str):
             try:
@@ -147,7 +196,6 @@ def list_admin_orders(
     
     if executor_id:
         # Используем exists для фильтрации по исполнителю, чтобы избежать проблем с join
-        from sqlalchemy import exists
         query = query.where(
             exists().where(
                 ExecutorAssignment.order_id == Order.id,
@@ -161,100 +209,75 @@ def list_admin_orders(
         if dept_code:
             query = query.where(Order.current_department_code == dept_code)
     
+    return query.order_by(Order.created_at.desc())
+
+
+def list_admin_orders_rows(
+    db: Session,
+    status: OrderStatus | str | None = None,
+    executor_id: uuid.UUID | None = None,
+    department_code: str | None = None,
+) -> list[RowMapping]:
+    """
+    Облегчённый список заказов для админ-панели.
+    Возвращает только колонки ADMIN_ORDER_LIST_COLUMNS без создания ORM-объектов.
+    """
+    query = _apply_admin_order_filters(
+        select(*ADMIN_ORDER_LIST_COLUMNS), status, executor_id, department_code
+    )
     try:
-        orders_list = list(db.scalars(query.order_by(Order.created_at.desc())))
-        return orders_list
-    except Exception as e:
-        # Логируем ошибку, но возвращаем пустой список вместо падения
-        import traceback
-        print(f"ERROR in list_admin_orders: {e}")
-        print(traceback.format_exc())
+        return list(db.execute(query).mappings().all())
+    except SQLAlchemyError:
+        logger.exception("list_admin_orders_rows failed", extra={"executor_id": executor_id})
         return []
 
 
 def get_admin_order_details(db: Session, order_id: uuid.UUID) -> dict | None:
     """Получить детальную информацию о заказе для админ-панели"""
+    # Один запрос по заказу + по одному IN-запросу на каждую связь
     try:
-        order = get_order(db, order_id)
-        if not order:
-            return None
-        
-        # Клиент
-        client = None
-        try:
-            client = user_service.get_user_by_id(db, order.client_id)
-        except Exception as e:
-            import traceback
-            print(f"Error getting client for order {order_id}: {e}")
-            print(traceback.format_exc())
-        
-        # Исполнитель
-        executor = None
-        executor_assignment = None
-        try:
-            assignment = db.scalar(
-                select(ExecutorAssignment)
-                .where(ExecutorAssignment.order_id == order_id)
-                .order_by(ExecutorAssignment.assigned_at.desc())
-                .limit(1)
+        order = db.scalar(
+            select(Order)
+            .where(Order.id == order_id)
+            .options(
+                joinedload(Order.client),
+                selectinload(Order.assignments).joinedload(ExecutorAssignment.executor),
+                selectinload(Order.files),
+                selectinload(Order.plan_versions),
+                selectinload(Order.status_history).joinedload(OrderStatusHistory.changed_by),
             )
-            if assignment:
-                executor = user_service.get_user_by_id(db, assignment.executor_id)
-                assignment_status = str(assignment.status)
-                if hasattr(assignment.status, 'value'):
-                    assignment_status = assignment.status.value
-                executor_assignment = {
-                    "id": str(assignment.id),
-                    "executorId": str(assignment.executor_id),
-                    "status": assignment_status,
-                    "assignedAt": assignment.assigned_at.isoformat() if assignment.assigned_at else None,
-                }
-        except Exception as e:
-            import traceback
-            print(f"Error getting executor for order {order_id}: {e}")
-            print(traceback.format_exc())
-        
-        # Файлы
-        files = []
-        try:
-            files = list(db.scalars(select(OrderFile).where(OrderFile.order_id == order_id)))
-        except Exception as e:
-            import traceback
-            print(f"Error getting files for order {order_id}: {e}")
-            print(traceback.format_exc())
-        
-        # Версии планов
-        plan_versions = []
-        try:
-            plan_versions = get_plan_versions(db, order_id)
-        except Exception as e:
-            import traceback
-            print(f"Error getting plan versions for order {order_id}: {e}")
-            print(traceback.format_exc())
-        
-        # История статусов
-        status_history = []
-        try:
-            status_history = get_status_history(db, order_id)
-        except Exception as e:
-            import traceback
-            print(f"Error getting status history for order {order_id}: {e}")
-            print(traceback.format_exc())
-        
-        return {
-            "order": order,
-            "client": client,
-            "executor": executor,
-            "executorAssignment": executor_assignment,
-            "files": files,
-            "planVersions": plan_versions,
-            "statusHistory": status_history,
-        }
-    except Exception as e:
-        import traceback
-        print(f"CRITICAL ERROR in get_admin_order_details for order {order_id}: {e}")
-        print(traceback.format_exc())
+        )
+    except SQLAlchemyError:
+        logger.exception("get_admin_order_details failed for order %s", order_id)
+        return None
+    if not order:
         return None
+    
+    # Исполнитель - последнее назначение
+    executor = None
+    executor_assignment = None
+    assignment = max(order.assignments, key=attrgetter("assigned_at"), default=None)
+    if assignment:
+        executor = assignment.executor
+        assignment_status = str(assignment.status)
+        if hasattr(assignment.status, 'value'):
+            assignment_status = assignment.status.value
+        executor_assignment = {
+            "id": str(assignment.id),
+            "executorId": str(assignment.executor_id),
+            "status": assignment_status,
+            "assignedAt": assignment.assigned_at.isoformat() if assignment.assigned_at else None,
+        }
+    
+    return {
+        "order": order,
+        "client": order.client,
+        "executor": executor,
+        "executorAssignment": executor_assignment,
+        "files": list(order.files),
+        "planVersions": sorted(order.plan_versions, key=attrgetter("created_at")),
+        "statusHistory": sorted(order.status_history, key=attrgetter("created_at")),
+    }
 
 
 def admin_send_for_revision(db: Session, order: Order, admin: User, comment: str) -> OrderStatusHistory:
@@ -273,39 +296,90 @@ def admin_reject_order(db: Session, order: Order, admin: User, comment: str) ->
     return add_status_history(db, order, OrderStatus.REJECTED, admin, comment)
 
 
-def assign_executor(
-    db: Session, order: Order, executor: User, assigned_by: User | None = None
-) -> ExecutorAssignment:
-    assignment = ExecutorAssignment(
-        order_id=order.id,
-        executor_id=executor.id,
-        assigned_by_id=assigned_by.id if assigned_by else None,
-        status=AssignmentStatus.ASSIGNED,
+@lru_cache(maxsize=8)
+def _has_assignment_unique_index(bind) -> bool:
+    """Есть ли в БД uq_assignment_order_exec (проверяется один раз на подключение)"""
+    return any(
+        index["name"] == "uq_assignment_order_exec" and index["unique"]
+        for index in inspect(bind).get_indexes(ExecutorAssignment.__tablename__)
     )
+
+
+def _upsert_assignment(
+    db: Session,
+    order: Order,
+    executor: User,
+    assigned_by: User | None,
+    status_value: AssignmentStatus,
+    **conflict_values,
+) -> ExecutorAssignment:
+    """
+    Создать или обновить назначение одним запросом:
+    INSERT ... ON CONFLICT (order_id, executor_id) DO UPDATE ... RETURNING.
+    """
     if executor.executor_profile and executor.executor_profile.department_code:
         if order.current_department_code is None:
             order.current_department_code = executor.executor_profile.department_code
-    db.add(assignment)
-    add_status_history(db, order, OrderStatus.EXECUTOR_ASSIGNED, assigned_by)
-    db.refresh(assignment)
-    return assignment
-
-
-def executor_take_order(db: Session, order: Order, executor: User) -> ExecutorAssignment:
-    assignment = (
-        db.scalar(
-            select(ExecutorAssignment).where(
+    if not _has_assignment_unique_index(db.get_bind()):
+        # ON CONFLICT требует уникального индекса; без него (старая БД) - select + update
+        assignment = db.scalar(
+            select(ExecutorAssignment)
+            .where(
                 ExecutorAssignment.order_id == order.id,
                 ExecutorAssignment.executor_id == executor.id,
             )
+            .order_by(ExecutorAssignment.updated_at.desc())
+            .limit(1)
         )
-        or assign_executor(db, order, executor, executor)
+        if assignment is None:
+            assignment = ExecutorAssignment(
+                order_id=order.id,
+                executor_id=executor.id,
+                assigned_by_id=assigned_by.id if assigned_by else None,
+            )
+            db.add(assignment)
+        else:
+            for key, value in conflict_values.items():
+                setattr(assignment, key, value)
+        assignment.status = status_value
+        db.flush()
+        return assignment
+    dialect_insert = sqlite_insert if db.get_bind().dialect.name == "sqlite" else pg_insert
+    stmt = dialect_insert(ExecutorAssignment).values(
+        order_id=order.id,
+        executor_id=executor.id,
+        assigned_by_id=assigned_by.id if assigned_by else None,
+        status=status_value,
     )
-    assignment.status = AssignmentStatus.ACCEPTED
-    db.add(assignment)
-    add_status_history(db, order, OrderStatus.EXECUTOR_ASSIGNED, executor)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ExecutorAssignment.order_id, ExecutorAssignment.executor_id],
+        set_={"status": status_value, "updated_at": datetime.utcnow(), **conflict_values},
+    ).returning(ExecutorAssignment)
+    return db.scalar(stmt, execution_options={"populate_existing": True})
+
+
+def assign_executor(
+    db: Session, order: Order, executor: User, assigned_by: User | None = None
+) -> ExecutorAssignment:
+    # Повторное назначение того же исполнителя обновляет существующую запись
+    assignment = _upsert_assignment(
+        db,
+        order,
+        executor,
+        assigned_by,
+        AssignmentStatus.ASSIGNED,
+        assigned_by_id=assigned_by.id if assigned_by else None,
+        assigned_at=datetime.utcnow(),
+    )
+    add_status_history(db, order, OrderStatus.EXECUTOR_ASSIGNED, assigned_by, commit=False)
+    db.commit()
+    return assignment
+
+
+def executor_take_order(db: Session, order: Order, executor: User) -> ExecutorAssignment:
+    assignment = _upsert_assignment(db, order, executor, executor, AssignmentStatus.ACCEPTED)
+    add_status_history(db, order, OrderStatus.EXECUTOR_ASSIGNED, executor, commit=False)
     db.commit()
-    db.refresh(assignment)
     return assignment
 
 
@@ -319,10 +393,8 @@ def executor_decline_order(db: Session, order: Order, executor: User) -> Executo
     if not assignment:
         raise HTTPException(status_code=404, detail="Assignment not found")
     assignment.status = AssignmentStatus.DECLINED
-    db.add(assignment)
-    add_status_history(db, order, OrderStatus.REJECTED, executor)
+    add_status_history(db, order, OrderStatus.REJECTED, executor, commit=False)
     db.commit()
-    db.refresh(assignment)
     return assignment
 
 
@@ -333,23 +405,14 @@ def get_executor_orders(
     Получить заказы исполнителя.
     Если executor_id = None (для суперадмина), возвращает все заказы с назначениями.
     """
-    if executor_id is None:
-        # Для суперадмина - все заказы с назначениями
-        query = (
-            select(Order)
-            .join(ExecutorAssignment, ExecutorAssignment.order_id == Order.id)
-            .where(ExecutorAssignment.status != AssignmentStatus.DECLINED)
-        )
-    else:
+    query = (
+        select(Order)
+        .join(ExecutorAssignment, ExecutorAssignment.order_id == Order.id)
+        .where(ExecutorAssignment.status != AssignmentStatus.DECLINED)
+    )
+    if executor_id is not None:
         # Для обычного исполнителя - только его заказы
-        query = (
-            select(Order)
-            .join(ExecutorAssignment, ExecutorAssignment.order_id == Order.id)
-            .where(
-                ExecutorAssignment.executor_id == executor_id,
-                ExecutorAssignment.status != AssignmentStatus.DECLINED,
-            )
-        )
+        query = query.where(ExecutorAssignment.executor_id == executor_id)
     
     if status_filter:
         if isinstance(status_filter, list):
@@ -358,20 +421,55 @@ def get_executor_orders(
             query = query.where(Order.status == status_filter)
     if department_code:
         query = query.where(Order.current_department_code == department_code)
-    return list(db.scalars(query))
+    # calculator_input в списке исполнителя не используется; при обращении догрузится
+    query = query.options(defer(Order.calculator_input))
+    # JOIN с назначениями может повторить заказ (несколько исполнителей у суперадмина)
+    return list(db.scalars(query).unique())
 
 
-def add_file(db: Session, order: Order, file: UploadFile, uploaded_by: User | None = None) -> OrderFile:
-    storage_dir = Path(settings.static_root) / "orders" / str(order.id)
+# Размер буфера при записи загружаемых файлов на диск
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+@lru_cache(maxsize=1024)
+def _ensure_order_storage_dir(order_id: uuid.UUID) -> Path:
+    """Создать каталог файлов заказа (mkdir выполняется один раз на процесс)"""
+    storage_dir = Path(settings.static_root) / "orders" / str(order_id)
     storage_dir.mkdir(parents=True, exist_ok=True)
-    file_path = storage_dir / file.filename
-    content = file.file.read()
-    file_path.write_bytes(content)
-    path_value = f"{settings.static_url.rstrip('/')}/orders/{order.id}/{file.filename}"
+    return storage_dir
+
+
+def _save_upload(source: BinaryIO, file_path: Path) -> str:
+    """Записать загрузку на диск порциями и вернуть SHA-256 содержимого"""
+    digest = hashlib.sha256()
+    with file_path.open("wb") as out:
+        while chunk := source.read(UPLOAD_CHUNK_SIZE):
+            digest.update(chunk)
+            out.write(chunk)
+        if settings.require_fsync:
+            out.flush()
+            os.fsync(out.fileno())
+    return digest.hexdigest()
+
+
+def add_file(db: Session, order: Order, file: UploadFile, uploaded_by: User | None = None) -> OrderFile:
+    """Сохранить загрузку заказа.
+
+    Запись на диск блокирующая: вызывать из синхронных роутов (FastAPI выполняет их
+    в пуле потоков) или из async-кода через run_in_threadpool.
+    """
+    storage_dir = _ensure_order_storage_dir(order.id)
+    # Исходное имя оставляем только для отображения, на диске храним под UUID
+    original_name = Path(file.filename or "file").name
+    stored_name = f"{uuid.uuid4().hex}{Path(original_name).suffix}"
+    file_path = storage_dir / stored_name
+    content_hash = _save_upload(file.file, file_path)
+    path_value = f"{settings.static_url.rstrip('/')}/orders/{order.id}/{stored_name}"
     order_file = OrderFile(
         order_id=order.id,
-        filename=file.filename,
+        filename=original_name,
         path=path_value,
+        content_hash=content_hash,
         uploaded_by_id=uploaded_by.id if uploaded_by else None,
     )
     db.add(order_file)
@@ -387,22 +485,32 @@ def get_order_files(db: Session, order_id: uuid.UUID) -> list[OrderFile]:
 def add_plan_version(
     db: Session, order: Order, payload: SavePlanChangesRequest, created_by: User | None = None
 ) -> OrderPlanVersion:
-    existing = db.scalar(
-        select(OrderPlanVersion).where(
+    plan_data = payload.plan.model_dump()
+    values: dict = {"plan": plan_data}
+    if payload.comment:
+        values["comment"] = payload.comment
+    if created_by:
+        values["created_by_id"] = created_by.id
+    # Версии EXECUTOR_EDITED и FINAL повторяются, поэтому обновляем только последнюю
+    latest_id = (
+        select(OrderPlanVersion.id)
+        .where(
             OrderPlanVersion.order_id == order.id,
             OrderPlanVersion.version_type == payload.version_type,
         )
+        .order_by(OrderPlanVersion.created_at.desc())
+        .limit(1)
+        .scalar_subquery()
     )
-    plan_data = payload.plan.model_dump()
-    if existing:
-        existing.plan = plan_data
-        if payload.comment:
-            existing.comment = payload.comment
-        if created_by:
-            existing.created_by_id = created_by.id
-        db.add(existing)
-        plan = existing
-    else:
+    # UPDATE ... RETURNING вместо SELECT + UPDATE: один запрос, если версия уже есть
+    plan = db.scalars(
+        update(OrderPlanVersion)
+        .where(OrderPlanVersion.id == latest_id)
+        .values(**values)
+        .returning(OrderPlanVersion),
+        execution_options={"populate_existing": True},
+    ).first()
+    if plan is None:
         plan = OrderPlanVersion(
             order_id=order.id,
             version_type=payload.version_type,
@@ -441,11 +549,8 @@ def executor_approve_plan(
         )
         db.add(final_plan)
     
+    # add_status_history коммитит транзакцию вместе с финальной версией плана
     add_status_history(db, order, OrderStatus.READY_FOR_APPROVAL, executor, comment)
-    db.commit()
-    if final_plan:
-        db.refresh(final_plan)
-    db.refresh(order)
     return final_plan
 
 
@@ -464,10 +569,10 @@ def executor_edit_plan(
     db.add(edited_plan)
     add_status_history(
         db, order, OrderStatus.AWAITING_CLIENT_APPROVAL, executor,
-        f"План отредактирован исполнителем. {comment}"
+        f"План отредактирован исполнителем. {comment}",
+        commit=False,
     )
     db.commit()
-    db.refresh(edited_plan)
     return edited_plan
 
 
@@ -506,10 +611,8 @@ def get_status_history(db: Session, order_id: uuid.UUID) -> list[OrderStatusHist
             )
         )
         return history
-    except Exception as e:
-        import traceback
-        print(f"Error getting status history for order {order_id}: {e}")
-        print(traceback.format_exc())
+    except SQLAlchemyError:
+        logger.exception("get_status_history failed for order %s", order_id)
         return []
 
 
@@ -544,12 +647,12 @@ def schedule_visit(
     end_time,
     location: str | None = None,
 ) -> ExecutorCalendarEvent:
-    executor = user_service.get_user_by_id(db, executor_id)
+    executor = user_service.get_executor_by_id(db, executor_id)
     if not executor or not executor.executor_profile:
         raise HTTPException(status_code=404, detail="Executor not found")
     order.planned_visit_at = start_time
-    add_status_history(db, order, OrderStatus.VISIT_SCHEDULED, executor)
-    db.add(order)
+    # Коммит выполняет create_calendar_event вместе с событием календаря
+    add_status_history(db, order, OrderStatus.VISIT_SCHEDULED, executor, commit=False)
     event = create_calendar_event(
         db,
         executor_id=executor_id,
@@ -562,6 +665,37 @@ def schedule_visit(
     return event
 
 
+def schedule_visits(
+    db: Session,
+    order: Order,
+    executor_id: uuid.UUID,
+    visits: list[ExecutorScheduleVisitRequest],
+) -> list[ExecutorCalendarEvent]:
+    """Пакетное планирование выездов: одна запись в истории статусов и один коммит"""
+    executor = user_service.get_executor_by_id(db, executor_id)
+    if not executor or not executor.executor_profile:
+        raise HTTPException(status_code=404, detail="Executor not found")
+    # Как при последовательных вызовах schedule_visit: в заказе остаётся последний выезд
+    order.planned_visit_at = visits[-1].start_time
+    add_status_history(db, order, OrderStatus.VISIT_SCHEDULED, executor, commit=False)
+    events = [
+        ExecutorCalendarEvent(
+            executor_id=executor_id,
+            order_id=order.id,
+            start_time=visit.start_time,
+            end_time=visit.end_time,
+            location=visit.location,
+            notes=None,
+        )
+        for visit in visits
+    ]
+    db.add_all(events)
+    db.commit()
+    for event in events:
+        db.refresh(event)
+    return events
+
+
 def update_visit(
     db: Session,
     order: Order,
@@ -572,16 +706,17 @@ def update_visit(
 ) -> ExecutorCalendarEvent | None:
     exec_id = executor_id
     if exec_id:
-        executor = user_service.get_user_by_id(db, exec_id)
+        executor = user_service.get_executor_by_id(db, exec_id)
         if not executor or not executor.executor_profile:
             raise HTTPException(status_code=404, detail="Executor not found")
     else:
-        assignment = db.scalar(
-            select(ExecutorAssignment)
+        # Нужен только executor_id последнего назначения, строку целиком не загружаем
+        exec_id = db.scalar(
+            select(ExecutorAssignment.executor_id)
             .where(ExecutorAssignment.order_id == order.id)
             .order_by(ExecutorAssignment.assigned_at.desc())
+            .limit(1)
         )
-        exec_id = assignment.executor_id if assignment else None
     if exec_id is None:
         raise HTTPException(status_code=400, detail="Executor is required for visit")
     order.planned_visit_at = start_time or order.planned_visit_at
@@ -4,6 +4,11 @@ from collections import Counter
 from typing import Any
 
 
+def _format_counter(counter: Counter) -> str:
+    """Format counter items as "key: count" pairs in insertion order."""
+    return ", ".join(["%s: %d" % item for item in counter.items()])
+
+
 def summarize_plan(plan: dict[str, Any] | None) -> str:
     """Build a short human-readable description of the plan for LLM prompts."""
     if not plan:
@@ -17,21 +22,28 @@ def summarize_plan(plan: dict[str, Any] | None) -> str:
     px_per_meter = scale.get("px_per_meter") or scale.get("pxPerMeter")
 
     elements = plan.get("elements") or []
-    types_counter: Counter[str] = Counter()
-    role_counter: Counter[str] = Counter()
-    zones_counter: Counter[str] = Counter()
+    types: list[str] = []
+    roles: list[str] = []
+    zones: list[str] = []
     load_bearing = 0
 
+    # Collect keys in one pass and let Counter tally the lists in C
     for elem in elements:
-        elem_type = str(elem.get("type") or "unknown")
-        types_counter[elem_type] += 1
-        role = elem.get("role")
+        get = elem.get
+        elem_type = str(get("type") or "unknown")
+        types.append(elem_type)
+        role = get("role")
         if role:
-            role_counter[str(role)] += 1
-        if elem_type == "wall" and elem.get("loadBearing"):
-            load_bearing += 1
-        if elem_type == "zone":
-            zones_counter[str(elem.get("zoneType") or "zone")] += 1
+            roles.append(str(role))
+        if elem_type == "wall":
+            if get("loadBearing"):
+                load_bearing += 1
+        elif elem_type == "zone":
+            zones.append(str(get("zoneType") or "zone"))
+
+    types_counter = Counter(types)
+    role_counter = Counter(roles)
+    zones_counter = Counter(zones)
 
     lines: list[str] = []
     if width and height:
@@ -39,15 +51,12 @@ def summarize_plan(plan: dict[str, Any] | None) -> str:
     if px_per_meter:
         lines.append(f"Масштаб: {px_per_meter} px за метр")
     if types_counter:
-        type_parts = ", ".join(f"{t}: {c}" for t, c in types_counter.items())
-        lines.append(f"Элементы: {type_parts}")
+        lines.append(f"Элементы: {_format_counter(types_counter)}")
     if load_bearing:
         lines.append(f"Несущих стен: {load_bearing}")
     if zones_counter:
-        zone_parts = ", ".join(f"{z}: {c}" for z, c in zones_counter.items())
-        lines.append(f"Зоны: {zone_parts}")
+        lines.append(f"Зоны: {_format_counter(zones_counter)}")
     if role_counter:
-        role_parts = ", ".join(f"{r}: {c}" for r, c in role_counter.items())
-        lines.append(f"Статусы элементов: {role_parts}")
+        lines.append(f"Статусы элементов: {_format_counter(role_counter)}")
 
     return "\n".join(lines) or "Нет данных по плану."
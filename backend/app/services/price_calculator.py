@@ -1,70 +1,151 @@
 from __future__ import annotations
 
+from collections import OrderedDict
+from itertools import product
+from threading import Lock
+import time
+
+from sqlalchemy import literal, select, union_all
 from sqlalchemy.orm import Session
 
 from app.models.directory import District, HouseType
 from app.models.order import Order
 from app.schemas.pricing import PriceBreakdown
 
+# Коэффициенты районов и типов домов меняются редко: держим их в памяти процесса.
+# Правки через directory_service сбрасывают кэш сразу, другие воркеры увидят их через TTL.
+# Коды приходят из открытого /calc/estimate, поэтому кэш ограничен (LRU) и хранит
+# только коды, которые есть в справочнике
+PRICING_CACHE_TTL = 60.0
+PRICING_CACHE_MAXSIZE = 256
+_coef_cache: OrderedDict[tuple[str, str], tuple[float, float]] = OrderedDict()
+_coef_cache_lock = Lock()
+
+PRICE_PER_M2 = 500.0
+# Фиксированная стоимость работ, порядок как в форме калькулятора
+WORK_COSTS = (("walls", 3000.0), ("wet_zone", 7000.0), ("doorways", 5000.0))
+
+BASEMENT_COEF = 1.2
+JOIN_APARTMENTS_COEF = 1.5
+URGENT_COEF = 1.3
+
+
+def _features_coef(basement: bool, join_apartments: bool, urgent: bool) -> tuple[float, float]:
+    """Коэффициент за особенности и он же, округлённый для PriceBreakdown"""
+    coef = 1.0
+    if basement:
+        coef *= BASEMENT_COEF
+    if join_apartments:
+        coef *= JOIN_APARTMENTS_COEF
+    if urgent:
+        coef *= URGENT_COEF
+    return coef, round(coef, 2)
+
+
+# Все 8 сочетаний (подвал, объединение квартир, срочность) считаем заранее
+_FEATURES_COEF_LUT: dict[tuple[bool, bool, bool], tuple[float, float]] = {
+    flags: _features_coef(*flags) for flags in product((False, True), repeat=3)
+}
+
+# Ключи calculator_input, от которых зависит цена
+_PRICE_INPUT_KEYS = frozenset({"area", "works", "features", "urgent", "hasBasement"})
+
+
+def invalidate_pricing_cache() -> None:
+    """Сбросить кэш коэффициентов после изменения справочников"""
+    with _coef_cache_lock:
+        _coef_cache.clear()
+
+
+def _cache_get(key: tuple[str, str], now: float) -> float | None:
+    with _coef_cache_lock:
+        cached = _coef_cache.get(key)
+        if cached is None:
+            return None
+        if cached[1] <= now:
+            del _coef_cache[key]
+            return None
+        _coef_cache.move_to_end(key)
+        return cached[0]
+
+
+def _cache_put(key: tuple[str, str], coef: float, now: float) -> None:
+    with _coef_cache_lock:
+        _coef_cache[key] = (coef, now + PRICING_CACHE_TTL)
+        _coef_cache.move_to_end(key)
+        if len(_coef_cache) > PRICING_CACHE_MAXSIZE:
+            _coef_cache.popitem(last=False)
+
+
+def _directory_coefs(
+    db: Session, district_code: str | None, house_type_code: str | None
+) -> tuple[float, float]:
+    """Коэффициенты района и типа дома; промахи кэша добираются одним запросом"""
+    now = time.monotonic()
+    coefs = {District.__tablename__: 1.0, HouseType.__tablename__: 1.0}
+    missed: dict[str, str] = {}
+    queries = []
+    for model, code in ((District, district_code), (HouseType, house_type_code)):
+        if not code:
+            continue
+        table = model.__tablename__
+        cached = _cache_get((table, code), now)
+        if cached is not None:
+            coefs[table] = cached
+            continue
+        missed[table] = code
+        queries.append(select(literal(table).label("tbl"), model.price_coef).where(model.code == code))
+    if queries:
+        # UNION ALL вместо двух db.get(): один round-trip, строки различаются по метке tbl
+        stmt = queries[0] if len(queries) == 1 else union_all(*queries)
+        for table, price_coef in db.execute(stmt):
+            if price_coef is not None:
+                coefs[table] = float(price_coef)
+            # Строки есть только у найденных кодов - их и кэшируем
+            _cache_put((table, missed[table]), coefs[table], now)
+    return coefs[District.__tablename__], coefs[HouseType.__tablename__]
+
 
 def calculate_price(
     db: Session,
     district_code: str | None,
     house_type_code: str | None,
     calculator_input: dict | None,
+    copy: bool = True,
 ) -> tuple[float, PriceBreakdown]:
-    calc = dict(calculator_input or {})
+    """Входной словарь не изменяется; с copy=False breakdown.raw - сам calculator_input
+    без нормализации features (для внутренних вызовов, которым breakdown не нужен)"""
+    calc = calculator_input or {}
+    if _PRICE_INPUT_KEYS.isdisjoint(calc):
+        # Пустой расчёт (например, первичная оценка): цена 0 при любых коэффициентах,
+        # справочники не запрашиваем
+        raw = {**calc, "features": {}} if copy else calc
+        return 0.0, PriceBreakdown(baseComponent=0.0, worksComponent=0.0, featuresCoef=1.0, raw=raw)
 
     # Backward compatibility: старые заказы могли присылать hasBasement на верхнем уровне
-    features = dict(calc.get("features") or {})
+    features = calc.get("features") or {}
     if "hasBasement" in calc and "basement" not in features:
-        features["basement"] = bool(calc.get("hasBasement"))
-    calc["features"] = features
+        features = {**features, "basement": bool(calc.get("hasBasement"))}
 
-    district_coef = 1.0
-    if district_code:
-        district = db.get(District, district_code)
-        if district and district.price_coef is not None:
-            district_coef = float(district.price_coef)
-
-    house_coef = 1.0
-    if house_type_code:
-        house = db.get(HouseType, house_type_code)
-        if house and house.price_coef is not None:
-            house_coef = float(house.price_coef)
-
-    base_component = 0.0
-
-    area = float(calc.get("area") or 0)
-    price_per_m2 = 500.0
-    area_cost = area * price_per_m2
+    district_coef, house_coef = _directory_coefs(db, district_code, house_type_code)
 
+    area_cost = float(calc.get("area") or 0) * PRICE_PER_M2
     works = calc.get("works") or {}
-    works_cost = 0.0
-    if works.get("walls"):
-        works_cost += 3000
-    if works.get("wet_zone"):
-        works_cost += 7000
-    if works.get("doorways"):
-        works_cost += 5000
-    works_component = area_cost + works_cost
+    works_component = area_cost + sum(cost for key, cost in WORK_COSTS if works.get(key))
 
-    features = calc.get("features") or {}
-    coef_features = 1.0
-    if features.get("basement"):
-        coef_features *= 1.2
-    if features.get("join_apartments"):
-        coef_features *= 1.5
-    if calc.get("urgent"):
-        coef_features *= 1.3
-
-    # район и тип дома влияют на общую стоимость
-    estimated = (base_component + works_component) * coef_features * district_coef * house_coef
+    coef_features, coef_features_rounded = _FEATURES_COEF_LUT[
+        bool(features.get("basement")),
+        bool(features.get("join_apartments")),
+        bool(calc.get("urgent")),
+    ]
+
+    # район и тип дома влияют на общую стоимость; базовой составляющей сейчас нет
+    estimated = works_component * coef_features * district_coef * house_coef
     breakdown = PriceBreakdown(
-        baseComponent=round(base_component, 2),
+        baseComponent=0.0,
         worksComponent=round(works_component * district_coef * house_coef, 2),
-        featuresCoef=round(coef_features, 2),
-        raw=calc,
+        featuresCoef=coef_features_rounded,
+        raw={**calc, "features": features} if copy else calc,
     )
     return round(estimated, 2), breakdown
 
@@ -80,6 +161,7 @@ def calculate_order_price(
             district_code=order.district_code,
             house_type_code=order.house_type_code,
             calculator_input=calculator_input or {},
+            copy=False,
         )
         return estimated, None
     except Exception:
@@ -1,5 +1,6 @@
-import uuid
 from pathlib import Path
+import shutil
+import uuid
 
 from fastapi import UploadFile
 from sqlalchemy import select
@@ -8,6 +9,8 @@ from sqlalchemy.orm import Session
 from app.core.config import settings
 from app.models.texture import Texture
 
+TEXTURE_CHUNK_SIZE = 1024 * 1024
+
 
 def list_textures(db: Session) -> list[Texture]:
     return db.scalars(select(Texture)).all()
@@ -26,8 +29,8 @@ def save_texture_file(upload: UploadFile, filename: str) -> Path:
     textures_dir.mkdir(parents=True, exist_ok=True)
     file_path = textures_dir / filename
     with file_path.open("wb") as out:
-        content = upload.file.read()
-        out.write(content)
+        # Копируем порциями по 1 МБ, не загружая текстуру в память целиком
+        shutil.copyfileobj(upload.file, out, TEXTURE_CHUNK_SIZE)
     return file_path
 
 
@@ -1,48 +1,61 @@
 from typing import Iterable
 
-from sqlalchemy import select, exists
-from sqlalchemy.orm import Session
+from sqlalchemy import bindparam, exists, lambda_stmt, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload
 
 from app.core.security import get_password_hash, verify_password
 from app.models.user import ClientProfile, ExecutorProfile, User
 from app.schemas.user import ExecutorCreateRequest, UserCreate, UserUpdateAdmin
 
 
+# Логин и проверка дубликата при регистрации: запрос собирается один раз,
+# дальше из кэша берётся уже скомпилированный SQL (поиск по уникальному индексу email)
+_user_by_email_stmt = lambda_stmt(lambda: select(User).where(User.email == bindparam("email")))
+
+# Списки пользователей по ролям; exists() не размножает строки, поэтому DISTINCT не нужен
+_list_users_stmts = {
+    "": lambda_stmt(lambda: select(User)),
+    "client": lambda_stmt(
+        lambda: select(User).where(exists().where(ClientProfile.user_id == User.id))
+    ),
+    "executor": lambda_stmt(
+        lambda: select(User).where(exists().where(ExecutorProfile.user_id == User.id))
+    ),
+    "admin": lambda_stmt(lambda: select(User).where(User.is_admin.is_(True))),
+}
+
+
 def get_user_by_email(db: Session, email: str) -> User | None:
-    return db.scalar(select(User).where(User.email == email))
+    return db.scalar(_user_by_email_stmt, {"email": email})
 
 
 def get_user_by_id(db: Session, user_id) -> User | None:
     return db.get(User, user_id)
 
 
-def list_users(db: Session, role: str | None = None) -> list[User]:
-    """Получить список пользователей с фильтром по роли"""
-    query = select(User)
-    
-    if role:
-        role_lower = role.lower()
-        if role_lower == "client":
-            # Пользователи с client_profile
-            query = query.where(
-                exists().where(ClientProfile.user_id == User.id)
-            )
-        elif role_lower == "executor":
-            # Пользователи с executor_profile
-            query = query.where(
-                exists().where(ExecutorProfile.user_id == User.id)
-            )
-        elif role_lower == "admin":
-            # Пользователи с is_admin = True
-            query = query.where(User.is_admin == True)
-    
-    return list(db.scalars(query).distinct())
+def get_executor_by_id(db: Session, user_id) -> User | None:
+    """Пользователь вместе с executor_profile одним запросом; повторный вызов в той же
+    сессии берёт пользователя из identity map без SQL"""
+    return db.get(User, user_id, options=[joinedload(User.executor_profile)])
+
 
+def list_users(
+    db: Session, role: str | None = None, limit: int | None = None, offset: int = 0
+) -> list[User]:
+    """Получить список пользователей с фильтром по роли (limit=None - без ограничения)"""
+    # Неизвестная роль - список без фильтра
+    stmt = _list_users_stmts.get((role or "").lower(), _list_users_stmts[""])
+    if limit is not None or offset:
+        # Для стабильных страниц нужен порядок; limit/offset уходят в SQL параметрами
+        stmt = stmt + (lambda s: s.order_by(User.created_at, User.id).offset(offset))
+        if limit is not None:
+            stmt = stmt + (lambda s: s.limit(limit))
+    return list(db.scalars(stmt))
 
-def create_user(db: Session, data: UserCreate) -> User:
-    existing = get_user_by_email(db, data.email)
-    if existing:
-        raise ValueError("User with this email already exists")
+
+def create_user(db: Session, data: UserCreate, commit: bool = True) -> User:
+    """Создать пользователя; с commit=False только flush - профиль добавит вызывающий"""
     user = User(
         email=data.email,
         full_name=data.full_name,
@@ -52,16 +65,22 @@ def create_user(db: Session, data: UserCreate) -> User:
         is_superadmin=getattr(data, "is_superadmin", False),
     )
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    # Дубликат email ловит уникальный индекс: без предварительного SELECT и без гонки между проверкой и вставкой
+    try:
+        db.flush()
+    except IntegrityError as exc:
+        db.rollback()
+        raise ValueError("User with this email already exists") from exc
+    if commit:
+        db.commit()
     return user
 
 
 def create_client(db: Session, data: UserCreate) -> User:
-    user = create_user(db, data)
+    # Пользователь и профиль создаются в одной транзакции
+    user = create_user(db, data, commit=False)
     db.add(ClientProfile(user_id=user.id))
     db.commit()
-    db.refresh(user)
     return user
 
 
@@ -76,6 +95,7 @@ def create_executor(db: Session, data: ExecutorCreateRequest) -> User:
             is_admin=data.is_admin if hasattr(data, "is_admin") and data.is_admin is not None else False,
             is_superadmin=data.is_superadmin if hasattr(data, "is_superadmin") and data.is_superadmin is not None else False,
         ),
+        commit=False,
     )
     profile = ExecutorProfile(
         user_id=user.id,
@@ -85,7 +105,6 @@ def create_executor(db: Session, data: ExecutorCreateRequest) -> User:
     )
     db.add(profile)
     db.commit()
-    db.refresh(user)
     return user
 
 
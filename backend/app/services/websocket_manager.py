@@ -1,26 +1,38 @@
 """Менеджер WebSocket подключений для чатов"""
 from __future__ import annotations
 
+import asyncio
+from collections import defaultdict
 import uuid
-from typing import Dict, Set
+from typing import DefaultDict
+from weakref import WeakKeyDictionary, WeakSet
 
 from fastapi import WebSocket
+import orjson
+
+
+def _encode(message: dict) -> str:
+    """Компактный JSON без экранирования не-ASCII, как у WebSocket.send_json, но через orjson.
+
+    Кадры остаются текстовыми: браузерные клиенты разбирают event.data как строку.
+    """
+    return orjson.dumps(message, option=orjson.OPT_NAIVE_UTC).decode()
 
 
 class ConnectionManager:
     """Менеджер WebSocket подключений для чатов"""
     
     def __init__(self):
-        # chat_id -> Set[WebSocket]
-        self.active_connections: Dict[uuid.UUID, Set[WebSocket]] = {}
+        # Слабые ссылки: сокет, для которого не вызвали disconnect, исчезнет сам,
+        # как только его обработчик завершится и объект соберёт GC
+        # chat_id -> WeakSet[WebSocket]
+        self.active_connections: DefaultDict[uuid.UUID, WeakSet[WebSocket]] = defaultdict(WeakSet)
         # websocket -> (user_id, chat_id)
-        self.connection_info: Dict[WebSocket, tuple[uuid.UUID, uuid.UUID]] = {}
+        self.connection_info: WeakKeyDictionary[WebSocket, tuple[uuid.UUID, uuid.UUID]] = WeakKeyDictionary()
     
     async def connect(self, websocket: WebSocket, chat_id: uuid.UUID, user_id: uuid.UUID):
         """Подключить пользователя к чату"""
         await websocket.accept()
-        if chat_id not in self.active_connections:
-            self.active_connections[chat_id] = set()
         self.active_connections[chat_id].add(websocket)
         self.connection_info[websocket] = (user_id, chat_id)
     
@@ -37,7 +49,7 @@ class ConnectionManager:
     async def send_personal_message(self, message: dict, websocket: WebSocket):
         """Отправить сообщение конкретному подключению"""
         try:
-            await websocket.send_json(message)
+            await websocket.send_text(_encode(message))
         except Exception:
             # Соединение закрыто, удаляем его
             self.disconnect(websocket)
@@ -52,18 +64,23 @@ class ConnectionManager:
         if chat_id not in self.active_connections:
             return
         
-        disconnected = set()
-        for connection in self.active_connections[chat_id]:
-            if connection == exclude:
-                continue
-            try:
-                await connection.send_json(message)
-            except Exception:
-                disconnected.add(connection)
+        # Снимок получателей: набор может измениться, пока идут отправки
+        targets = [conn for conn in self.active_connections[chat_id] if conn is not exclude]
+        if not self.active_connections[chat_id]:
+            # Все сокеты чата уже собраны GC - убираем пустую запись
+            del self.active_connections[chat_id]
+            return
+        # Сериализуем один раз на всех получателей
+        payload = _encode(message)
+        # Отправляем всем одновременно: время рассылки - самая медленная отправка, а не сумма
+        results = await asyncio.gather(
+            *(conn.send_text(payload) for conn in targets), return_exceptions=True
+        )
         
         # Удаляем отключенные соединения
-        for conn in disconnected:
-            self.disconnect(conn)
+        for conn, result in zip(targets, results):
+            if isinstance(result, Exception):
+                self.disconnect(conn)
     
     def get_chat_connections_count(self, chat_id: uuid.UUID) -> int:
         """Получить количество активных подключений к чату"""
@@ -44,13 +44,8 @@ def check_or_create_superadmin():
                 db.add(user)
                 db.commit()
                 db.refresh(user)
+                # Новый хеш проверит финальный тест логина ниже - лишний bcrypt здесь не нужен
                 print(f"✅ Пароль обновлен")
-                
-                # Проверяем еще раз
-                if verify_password(password, user.password_hash):
-                    print(f"✅ Пароль работает после обновления")
-                else:
-                    print(f"❌ КРИТИЧЕСКАЯ ОШИБКА: Пароль не работает после обновления!")
             
             # Проверяем, что суперадмин установлен
             if not user.is_superadmin:
@@ -86,12 +81,7 @@ def check_or_create_superadmin():
                 print(f"   ID: {user.id}")
                 print(f"   is_admin: {user.is_admin}")
                 print(f"   is_superadmin: {user.is_superadmin}")
-                
-                # Проверяем пароль после создания
-                if verify_password(password, user.password_hash):
-                    print(f"✅ Пароль работает корректно")
-                else:
-                    print(f"❌ ОШИБКА: Пароль не работает после создания!")
+                # Пароль проверит финальный тест логина ниже
             except ValueError as e:
                 print(f"❌ Ошибка создания: {e}")
         
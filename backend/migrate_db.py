@@ -6,6 +6,23 @@
 import sqlite3
 from pathlib import Path
 
+# rowid лишних назначений для каждой пары (order_id, executor_id)
+DUPLICATE_ASSIGNMENTS_SQL = (
+    "SELECT rowid FROM ("
+    "SELECT rowid, ROW_NUMBER() OVER ("
+    "PARTITION BY order_id, executor_id ORDER BY "
+    "CASE status WHEN 'COMPLETED' THEN 0 WHEN 'ACCEPTED' THEN 1 WHEN 'ASSIGNED' THEN 2 ELSE 3 END, "
+    "updated_at DESC, rowid DESC"
+    ") AS rn FROM executor_assignments"
+    ") WHERE rn > 1"
+)
+
+def _table_exists(cursor, table_name):
+    """Есть ли таблица в базе (новые таблицы создаст само приложение)"""
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name=?", (table_name,))
+    return cursor.fetchone() is not None
+
+
 def migrate_database():
     """Выполняет миграции базы данных"""
     db_path = Path(__file__).parent / "app.db"
@@ -21,41 +38,86 @@ def migrate_database():
     try:
         print("🔄 Выполнение миграций базы данных...\n")
         
-        # Миграция 1: order_plan_versions
-        cursor.execute("PRAGMA table_info(order_plan_versions)")
-        columns = [row[1] for row in cursor.fetchall()]
-        
-        migrations_applied = 0
+        # Проверки идут по текущей схеме, а сами изменения копятся в statements
+        # и выполняются одним скриптом в одной транзакции (один fsync на все миграции)
+        statements = []
         
-        if 'comment' not in columns:
-            print("  ➕ Добавление колонки 'comment' в order_plan_versions...")
-            cursor.execute("ALTER TABLE order_plan_versions ADD COLUMN comment TEXT")
-            migrations_applied += 1
+        # Миграция 1: order_plan_versions
+        if _table_exists(cursor, "order_plan_versions"):
+            cursor.execute("PRAGMA table_info(order_plan_versions)")
+            columns = [row[1] for row in cursor.fetchall()]
+            
+            if 'comment' not in columns:
+                print("  ➕ Добавление колонки 'comment' в order_plan_versions...")
+                statements.append("ALTER TABLE order_plan_versions ADD COLUMN comment TEXT")
+            
+            if 'created_by_id' not in columns:
+                print("  ➕ Добавление колонки 'created_by_id' в order_plan_versions...")
+                statements.append("ALTER TABLE order_plan_versions ADD COLUMN created_by_id TEXT")
         
-        if 'created_by_id' not in columns:
-            print("  ➕ Добавление колонки 'created_by_id' в order_plan_versions...")
-            cursor.execute("ALTER TABLE order_plan_versions ADD COLUMN created_by_id TEXT")
-            migrations_applied += 1
+        if _table_exists(cursor, "users"):
+            cursor.execute("PRAGMA table_info(users)")
+            user_columns = [row[1] for row in cursor.fetchall()]
+            
+            # Миграция 2: users.is_blocked
+            if 'is_blocked' not in user_columns:
+                print("  ➕ Добавление колонки 'is_blocked' в users...")
+                statements.append("ALTER TABLE users ADD COLUMN is_blocked BOOLEAN DEFAULT 0 NOT NULL")
+            
+            # Миграция 3: users.is_superadmin
+            if 'is_superadmin' not in user_columns:
+                print("  ➕ Добавление колонки 'is_superadmin' в users...")
+                statements.append("ALTER TABLE users ADD COLUMN is_superadmin BOOLEAN DEFAULT 0 NOT NULL")
         
-        # Миграция 2: users.is_blocked
-        cursor.execute("PRAGMA table_info(users)")
-        user_columns = [row[1] for row in cursor.fetchall()]
+        # Миграция 4: order_files.content_hash
+        if _table_exists(cursor, "order_files"):
+            cursor.execute("PRAGMA table_info(order_files)")
+            file_columns = [row[1] for row in cursor.fetchall()]
+            
+            if 'content_hash' not in file_columns:
+                print("  ➕ Добавление колонки 'content_hash' в order_files...")
+                statements.append("ALTER TABLE order_files ADD COLUMN content_hash VARCHAR(64)")
         
-        if 'is_blocked' not in user_columns:
-            print("  ➕ Добавление колонки 'is_blocked' в users...")
-            cursor.execute("ALTER TABLE users ADD COLUMN is_blocked BOOLEAN DEFAULT 0 NOT NULL")
-            migrations_applied += 1
+        # Миграция 5: уникальный индекс executor_assignments (order_id, executor_id)
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='index' AND name='uq_assignment_order_exec'")
+        if not cursor.fetchone() and _table_exists(cursor, "executor_assignments"):
+            print("  ➕ Добавление уникального индекса 'uq_assignment_order_exec'...")
+            # Дубли пары заказ-исполнитель схлопываем в одну запись: оставляем самую
+            # продвинутую по статусу, при равенстве - последнюю по updated_at
+            cursor.execute(f"SELECT COUNT(*) FROM ({DUPLICATE_ASSIGNMENTS_SQL})")
+            duplicates = cursor.fetchone()[0]
+            if duplicates:
+                print(f"  ⚠️  Удаление дублирующихся назначений: {duplicates}")
+                statements.append(
+                    f"DELETE FROM executor_assignments WHERE rowid IN ({DUPLICATE_ASSIGNMENTS_SQL})"
+                )
+            statements.append(
+                "CREATE UNIQUE INDEX uq_assignment_order_exec "
+                "ON executor_assignments (order_id, executor_id)"
+            )
         
-        # Миграция 3: users.is_superadmin
-        if 'is_superadmin' not in user_columns:
-            print("  ➕ Добавление колонки 'is_superadmin' в users...")
-            cursor.execute("ALTER TABLE users ADD COLUMN is_superadmin BOOLEAN DEFAULT 0 NOT NULL")
-            migrations_applied += 1
+        # Миграция 6: индексы под частые фильтры order_service
+        for index_name, table_name, index_columns in (
+            ("ix_order_client_id", "orders", "client_id"),
+            ("ix_assignment_exec_status", "executor_assignments", "executor_id, status"),
+            ("ix_plan_version_order_type", "order_plan_versions", "order_id, version_type"),
+            ("ix_status_history_order_created", "order_status_history", "order_id, created_at"),
+            ("ix_calendar_executor", "executor_calendar_events", "executor_id"),
+        ):
+            cursor.execute("SELECT name FROM sqlite_master WHERE type='index' AND name=?", (index_name,))
+            if not cursor.fetchone() and _table_exists(cursor, table_name):
+                print(f"  ➕ Добавление индекса '{index_name}'...")
+                statements.append(f"CREATE INDEX {index_name} ON {table_name} ({index_columns})")
         
-        conn.commit()
+        # Миграция 7: частичный индекс по администраторам (условие как в list_users)
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='index' AND name='ix_users_is_admin_true'")
+        if not cursor.fetchone() and _table_exists(cursor, "users"):
+            print("  ➕ Добавление частичного индекса 'ix_users_is_admin_true'...")
+            statements.append("CREATE INDEX ix_users_is_admin_true ON users (id) WHERE is_admin IS 1")
         
-        if migrations_applied > 0:
-            print(f"\n✅ Применено миграций: {migrations_applied}")
+        if statements:
+            cursor.executescript("BEGIN;\n" + ";\n".join(statements) + ";\nCOMMIT;")
+            print(f"\n✅ Применено изменений схемы: {len(statements)}")
         else:
             print("\n✅ База данных актуальна, миграции не требуются")
         
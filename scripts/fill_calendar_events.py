@@ -2,22 +2,75 @@
 """
 Скрипт для наполнения базы данных случайными событиями календаря.
 Использует API по адресу http://178.215.238.184:8000/
+
+Запуск: python fill_calendar_events.py [--verbose]
+Параллельность задаётся переменной окружения FCE_CONCURRENCY (по умолчанию 16),
+FCE_SEED фиксирует генератор случайных событий (одинаковое расписание при повторе).
 """
 
+import asyncio
+import base64
+import contextlib
 import json
+import logging
+import os
 import random
 import sys
+import time
 from datetime import datetime, timedelta
+from pathlib import Path
 from typing import Optional
 
-import requests
+import httpx
+
+try:
+    import orjson
+except ImportError:  # без orjson работает на стандартном json
+    orjson = None
 
 API_BASE_URL = "http://178.215.238.184:8000/api/v1"
 
+log = logging.getLogger(__name__)
+
+# Прогресс отправки печатается раз в PROGRESS_EVERY событий; подробности - с --verbose
+PROGRESS_EVERY = 50
+
+# Число одновременных запросов создания событий
+CONCURRENCY = max(1, int(os.getenv("FCE_CONCURRENCY", "16")))
+
+# (connect, read) таймауты, чтобы зависший запрос не держал соединение пула
+REQUEST_TIMEOUT = (5, 30)
+
+# Временные ошибки сервера повторяются с экспоненциальной паузой
+# (RETRY_BACKOFF * 2^попытка) или столько, сколько просит Retry-After;
+# правило одно для всех запросов скрипта (см. _request_with_retry).
+# POST не идемпотентен: после 5xx сервер мог уже создать события, поэтому
+# для него повторяются только 429/503 с Retry-After (запрос точно не выполнен)
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+RETRY_POST_STATUSES = (429, 503)
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+RETRY_TOTAL = 5
+RETRY_BACKOFF = 0.3
+
+# Создание событий идёт параллельно: не больше CONCURRENCY запросов одновременно,
+# пул соединений того же размера, иначе запросы ждали бы свободное соединение
+ASYNC_LIMITS = httpx.Limits(
+    max_connections=CONCURRENCY, max_keepalive_connections=CONCURRENCY, keepalive_expiry=60
+)
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
 # Учетные данные исполнителя (из README)
 EXECUTOR_EMAIL = "executor@example.com"
 EXECUTOR_PASSWORD = "executor123"
 
+# Токен сохраняется между запусками и переиспользуется, пока до истечения больше минуты
+TOKEN_CACHE_PATH = Path.home() / ".cache" / "bti_deploy" / "executor_token.json"
+TOKEN_MIN_TTL = 60
+
+# Длительность события: 1-4 часа
+EVENT_DURATIONS = tuple(timedelta(hours=hours) for hours in (1, 2, 3, 4))
+
 # Случайные адреса для выездов
 LOCATIONS = [
     "г. Москва, ул. Ленина, д. 10, кв. 25",
@@ -33,172 +86,339 @@ LOCATIONS = [
 ]
 
 
-def login() -> Optional[str]:
-    """Авторизация и получение JWT токена"""
-    print(f"🔐 Авторизация как {EXECUTOR_EMAIL}...")
-    response = requests.post(
+def _dumps(payload) -> bytes:
+    """JSON тела запроса; datetime сериализуется в ISO 8601 без смены зоны"""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, default=datetime.isoformat).encode()
+
+
+def _loads(content: bytes):
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def _token_exp(token: str) -> Optional[float]:
+    """Время истечения из payload JWT (подпись не проверяется)"""
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        return float(json.loads(base64.urlsafe_b64decode(payload))["exp"])
+    except (IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+def _load_cached_token() -> Optional[str]:
+    try:
+        cached = json.loads(TOKEN_CACHE_PATH.read_text())
+        if cached["exp"] - time.time() > TOKEN_MIN_TTL:
+            return cached["token"]
+    except (OSError, KeyError, TypeError, ValueError):
+        pass
+    return None
+
+
+def _save_token(token: str) -> None:
+    exp = _token_exp(token)
+    if exp is None:
+        return
+    try:
+        TOKEN_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        # Файл с токеном доступен только владельцу
+        fd = os.open(TOKEN_CACHE_PATH, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w") as f:
+            json.dump({"token": token, "exp": exp}, f)
+    except OSError as e:
+        log.warning("⚠️  Не удалось сохранить токен: %s", e)
+
+
+def _drop_cached_token() -> None:
+    TOKEN_CACHE_PATH.unlink(missing_ok=True)
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    """Пауза из заголовка Retry-After (только в секундах)"""
+    try:
+        return max(float(response.headers["Retry-After"]), 0.0)
+    except (KeyError, ValueError):
+        return None
+
+
+async def _request_with_retry(
+    client: httpx.AsyncClient,
+    method: str,
+    url: str,
+    content: Optional[bytes] = None,
+    semaphore: Optional[asyncio.Semaphore] = None,
+) -> httpx.Response:
+    """Запрос с повторами; после исчерпания попыток возвращается последний ответ.
+    Из сетевых ошибок повторяются только ошибки соединения: при обрыве чтения
+    сервер мог уже создать события."""
+    headers = JSON_HEADERS if content is not None else None
+    for attempt in range(RETRY_TOTAL + 1):
+        try:
+            # Семафор держим только на время запроса, пауза перед повтором его не занимает
+            async with semaphore or contextlib.nullcontext():
+                response = await client.request(method, url, content=content, headers=headers)
+        except (httpx.ConnectError, httpx.ConnectTimeout):
+            if attempt == RETRY_TOTAL:
+                raise
+            delay = RETRY_BACKOFF * 2 ** attempt
+        else:
+            delay = _retry_after(response)
+            if method in IDEMPOTENT_METHODS:
+                retry = response.status_code in RETRY_STATUSES
+            else:
+                retry = response.status_code in RETRY_POST_STATUSES and delay is not None
+            if not retry or attempt == RETRY_TOTAL:
+                return response
+            if delay is None:
+                delay = RETRY_BACKOFF * 2 ** attempt
+        log.debug("  🔁 Повтор через %.1f с: %s", delay, url)
+        await asyncio.sleep(delay)
+
+
+async def login(client: httpx.AsyncClient, use_cache: bool = True) -> Optional[str]:
+    """Авторизация и получение JWT токена (из кэша, если он ещё действует)"""
+    if use_cache:
+        token = _load_cached_token()
+        if token:
+            client.headers["Authorization"] = f"Bearer {token}"
+            log.info("✅ Используется сохранённый токен")
+            return token
+    
+    log.info("🔐 Авторизация как %s...", EXECUTOR_EMAIL)
+    response = await _request_with_retry(
+        client,
+        "POST",
         f"{API_BASE_URL}/auth/login",
-        json={"email": EXECUTOR_EMAIL, "password": EXECUTOR_PASSWORD},
+        content=_dumps({"email": EXECUTOR_EMAIL, "password": EXECUTOR_PASSWORD}),
     )
     
     if response.status_code != 200:
-        print(f"❌ Ошибка авторизации: {response.status_code}")
-        print(f"Ответ: {response.text}")
+        log.error("❌ Ошибка авторизации: %d", response.status_code)
+        log.error("Ответ: %s", response.text)
         return None
     
-    data = response.json()
+    data = _loads(response.content)
     token = data.get("accessToken")
     if not token:
-        print("❌ Токен не получен")
+        log.error("❌ Токен не получен")
         return None
     
-    print("✅ Авторизация успешна")
+    # Дальше все запросы клиента идут с этим токеном
+    client.headers["Authorization"] = f"Bearer {token}"
+    _save_token(token)
+    log.info("✅ Авторизация успешна")
     return token
 
 
-def get_orders(token: str) -> list:
+async def get_orders(client: httpx.AsyncClient) -> list:
     """Получить список заказов исполнителя"""
-    print("\n📋 Получение списка заказов...")
-    headers = {"Authorization": f"Bearer {token}"}
-    response = requests.get(
-        f"{API_BASE_URL}/executor/orders",
-        headers=headers,
-    )
+    log.info("\n📋 Получение списка заказов...")
+    response = await _request_with_retry(client, "GET", f"{API_BASE_URL}/executor/orders")
+    
+    if response.status_code == 401:
+        # Сохранённый токен отозван или выдан другим сервером - авторизуемся заново
+        log.warning("⚠️  Токен отклонён, повторная авторизация...")
+        _drop_cached_token()
+        if not await login(client, use_cache=False):
+            return []
+        response = await _request_with_retry(client, "GET", f"{API_BASE_URL}/executor/orders")
     
     if response.status_code != 200:
-        print(f"❌ Ошибка получения заказов: {response.status_code}")
-        print(f"Ответ: {response.text}")
+        log.error("❌ Ошибка получения заказов: %d", response.status_code)
+        log.error("Ответ: %s", response.text)
         return []
     
-    orders = response.json()
-    print(f"✅ Найдено заказов: {len(orders)}")
+    orders = _loads(response.content)
+    log.info("✅ Найдено заказов: %d", len(orders))
     return orders
 
 
-def create_calendar_event(
-    token: str,
+async def create_calendar_events_async(
+    client: httpx.AsyncClient,
+    semaphore: asyncio.Semaphore,
     order_id: str,
-    start_time: datetime,
-    end_time: datetime,
-    location: Optional[str] = None,
-) -> bool:
-    """Создать событие календаря для заказа"""
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json",
-    }
-    
+    events: list,
+) -> int:
+    """Создать события календаря для заказа одним запросом; возвращает число созданных"""
     payload = {
-        "startTime": start_time.isoformat(),
-        "endTime": end_time.isoformat(),
-        "location": location,
+        "events": [
+            {"startTime": start_time, "endTime": end_time, "location": location}
+            for start_time, end_time, location in events
+        ]
     }
     
-    response = requests.post(
-        f"{API_BASE_URL}/executor/orders/{order_id}/schedule-visit",
-        headers=headers,
-        json=payload,
+    response = await _request_with_retry(
+        client,
+        "POST",
+        f"{API_BASE_URL}/executor/orders/{order_id}/schedule-visit/batch",
+        content=_dumps(payload),
+        semaphore=semaphore,
     )
     
     if response.status_code in (200, 201):
-        event = response.json()
-        print(f"  ✅ Создано событие: {event.get('id', 'N/A')} для заказа {order_id}")
-        return True
+        created = _loads(response.content)
+        log.debug("  ✅ Создано событий: %d для заказа %s", len(created), order_id)
+        return len(created)
     else:
-        print(f"  ❌ Ошибка создания события для заказа {order_id}: {response.status_code}")
-        print(f"  Ответ: {response.text}")
-        return False
+        log.error("  ❌ Ошибка создания событий для заказа %s: %d", order_id, response.status_code)
+        log.error("  Ответ: %s", response.text)
+        return 0
 
 
-def generate_random_datetime(start_days: int = -30, end_days: int = 60) -> datetime:
-    """Генерирует случайную дату/время в заданном диапазоне"""
-    now = datetime.now()
-    start = now + timedelta(days=start_days)
-    end = now + timedelta(days=end_days)
+async def create_calendar_events(client: httpx.AsyncClient, batches: list) -> list:
+    """Отправить события параллельно, по запросу на заказ; результат - число созданных
+    событий или исключение на каждый заказ"""
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    total = sum(len(events) for _, events in batches)
+    sent = 0
     
-    delta = end - start
-    random_seconds = random.randint(0, int(delta.total_seconds()))
-    random_datetime = start + timedelta(seconds=random_seconds)
+    async def send(client: httpx.AsyncClient, order_id: str, events: list) -> int:
+        nonlocal sent
+        created = await create_calendar_events_async(client, semaphore, order_id, events)
+        previous, sent = sent, sent + len(events)
+        if sent // PROGRESS_EVERY > previous // PROGRESS_EVERY or sent == total:
+            log.info("  ⏳ Отправлено событий: %d/%d", sent, total)
+        return created
     
-    # Округляем до часа
-    random_datetime = random_datetime.replace(minute=0, second=0, microsecond=0)
+    return await asyncio.gather(
+        *(
+            send(client, order_id, events)
+            for order_id, events in batches
+        ),
+        return_exceptions=True,
+    )
+
+
+def generate_random_datetime(
+    rng: random.Random,
+    now_ts: float,
+    span_seconds: int,
+    start_offset_seconds: int,
+) -> datetime:
+    """Случайное время в [now + start_offset, now + start_offset + span), округлённое до часа"""
+    ts = int(now_ts) + start_offset_seconds + rng.randrange(span_seconds)
+    # Округляем до часа арифметикой по timestamp (для зон со сдвигом в целые часы
+    # совпадает с округлением локального времени)
+    return datetime.fromtimestamp(ts - ts % 3600)
+
+
+def build_schedule(orders: list, n_per_order: int) -> list:
+    """Заранее сгенерировать события: [(order_id, [(start, end, location), ...]), ...]"""
+    order_ids = []
+    for order in orders:
+        order_id = order.get("id")
+        if not order_id:
+            log.warning("  ⚠️  Заказ без ID, пропускаем")
+            continue
+        order_ids.append(order_id)
+    
+    # Свой генератор на весь прогон; с FCE_SEED расписание воспроизводится
+    seed = os.getenv("FCE_SEED")
+    rng = random.Random(int(seed) if seed else None)
+    total = len(order_ids) * n_per_order
+    # Окно дат (от -30 до +60 дней от текущего момента) считается один раз
+    now_ts = time.time()
+    start_offset = -30 * 86400
+    span = 90 * 86400
+    # Все случайные величины выбираются заранее, одним проходом на каждую
+    starts = [generate_random_datetime(rng, now_ts, span, start_offset) for _ in range(total)]
+    durations = rng.choices(EVENT_DURATIONS, k=total)
+    locations = rng.choices(LOCATIONS, k=total)
     
-    return random_datetime
+    schedule = []
+    for order_idx, order_id in enumerate(order_ids):
+        first = order_idx * n_per_order
+        events = [
+            (starts[i], starts[i] + durations[i], locations[i])
+            for i in range(first, first + n_per_order)
+        ]
+        schedule.append((order_id, events))
+    return schedule
 
 
 def main():
-    """Основная функция"""
-    print("=" * 60)
-    print("📅 Наполнение базы данных событиями календаря")
-    print("=" * 60)
+    """Основная функция (--verbose - печатать каждое событие)"""
+    logging.basicConfig(
+        level=logging.DEBUG if "--verbose" in sys.argv[1:] else logging.INFO,
+        format="%(message)s",
+        stream=sys.stdout,
+    )
+    # Без этого --verbose включил бы и отладку httpx
+    for name in ("httpx", "httpcore", "asyncio"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+    log.info("=" * 60)
+    log.info("📅 Наполнение базы данных событиями календаря")
+    log.info("=" * 60)
+    asyncio.run(fill())
+
+
+async def fill():
+    """Авторизация, получение заказов и создание событий через один клиент:
+    соединение с API переиспользуется (keep-alive) всеми запросами скрипта"""
+    async with httpx.AsyncClient(
+        limits=ASYNC_LIMITS,
+        timeout=httpx.Timeout(REQUEST_TIMEOUT[1], connect=REQUEST_TIMEOUT[0]),
+    ) as client:
+        # Авторизация
+        token = await login(client)
+        if not token:
+            log.error("\n❌ Не удалось авторизоваться. Выход.")
+            sys.exit(1)
     
-    # Авторизация
-    token = login()
-    if not token:
-        print("\n❌ Не удалось авторизоваться. Выход.")
-        sys.exit(1)
+        # Получение заказов
+        orders = await get_orders(client)
+        if not orders:
+            log.error("\n❌ Нет заказов для создания событий. Выход.")
+            sys.exit(1)
     
-    # Получение заказов
-    orders = get_orders(token)
-    if not orders:
-        print("\n❌ Нет заказов для создания событий. Выход.")
-        sys.exit(1)
+        # Создание случайных событий
+        log.info("\n📅 Создание случайных событий календаря...")
+        log.info("-" * 60)
     
-    # Создание случайных событий
-    print(f"\n📅 Создание случайных событий календаря...")
-    print("-" * 60)
+        num_events_per_order = 5  # Создадим по 5 событий на каждый заказ
+        # Сначала собираем все события, затем отправляем их: один запрос на заказ,
+        # запросы по разным заказам - параллельно
+        batches = build_schedule(orders, num_events_per_order)
+        total_events = len(batches) * num_events_per_order
     
-    num_events_per_order = 5  # Создадим по 5 событий на каждый заказ
-    total_events = len(orders) * num_events_per_order
-    created = 0
-    failed = 0
+        log.info("📦 Заказов: %d, событий: %d", len(batches), total_events)
+        # Подробный план только с --verbose: в обычном запуске строки даже не форматируются
+        if log.isEnabledFor(logging.DEBUG):
+            for batch_idx, (order_id, events) in enumerate(batches):
+                log.debug("\n📦 Заказ %s... (%d/%d)", order_id[:8], batch_idx + 1, len(batches))
+                for event_idx, (start_time, end_time, location) in enumerate(events):
+                    event_num = batch_idx * num_events_per_order + event_idx + 1
+                    log.debug("  [%d/%d] Событие %d", event_num, total_events, event_idx + 1)
+                    log.debug("      Время: %s - %s", start_time.strftime("%Y-%m-%d %H:%M"), end_time.strftime("%H:%M"))
+                    log.debug("      Адрес: %s", location)
     
-    for order_idx, order in enumerate(orders, 1):
-        order_id = order.get("id")
-        if not order_id:
-            print(f"  ⚠️  Заказ без ID, пропускаем")
-            continue
-        
-        print(f"\n📦 Заказ {order_id[:8]}... ({order_idx}/{len(orders)})")
-        
-        # Создаем несколько событий для этого заказа
-        for event_idx in range(num_events_per_order):
-            # Генерируем случайное время (разные даты)
-            start_time = generate_random_datetime(start_days=-30, end_days=60)
-            # Длительность события: 1-4 часа
-            duration_hours = random.randint(1, 4)
-            end_time = start_time + timedelta(hours=duration_hours)
-            
-            # Случайный адрес
-            location = random.choice(LOCATIONS)
-            
-            event_num = (order_idx - 1) * num_events_per_order + event_idx + 1
-            print(f"  [{event_num}/{total_events}] Событие {event_idx + 1}")
-            print(f"      Время: {start_time.strftime('%Y-%m-%d %H:%M')} - {end_time.strftime('%H:%M')}")
-            print(f"      Адрес: {location}")
-            
-            if create_calendar_event(token, order_id, start_time, end_time, location):
-                created += 1
-            else:
-                failed += 1
+        log.info("-" * 60)
+        results = await create_calendar_events(client, batches)
+        for result in results:
+            if isinstance(result, Exception):
+                log.error("  ❌ Ошибка запроса: %r", result)
+        created = sum(result for result in results if not isinstance(result, Exception))
+        failed = sum(len(events) for _, events in batches) - created
     
-    # Итоги
-    print("\n" + "=" * 60)
-    print("📊 Итоги:")
-    print(f"  ✅ Создано событий: {created}")
-    print(f"  ❌ Ошибок: {failed}")
-    print("=" * 60)
+        # Итоги
+        log.info("\n" + "=" * 60)
+        log.info("📊 Итоги:")
+        log.info("  ✅ Создано событий: %d", created)
+        log.info("  ❌ Ошибок: %d", failed)
+        log.info("=" * 60)
 
 
 if __name__ == "__main__":
     try:
         main()
     except KeyboardInterrupt:
-        print("\n\n⚠️  Прервано пользователем")
+        log.warning("\n\n⚠️  Прервано пользователем")
         sys.exit(1)
     except Exception as e:
-        print(f"\n❌ Неожиданная ошибка: {e}")
-        import traceback
-        traceback.print_exc()
+        log.exception("\n❌ Неожиданная ошибка: %s", e)
         sys.exit(1)
 